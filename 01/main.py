@@ -1,5 +1,11 @@
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
 
+import numpy as np
+
 MAPPING = [
     "zero",
     "one",
@@ -44,10 +50,220 @@ def summarize(line):
     return int(xx)
 
 
+class DigitScanner:
+    # Aho-Corasick automaton over digits and their names, built once,
+    # transitions are precomputed so every character is a single dict lookup
+    def __init__(self, words, reverse=False, binary=False):
+        tokens = {str(index): index for index in range(len(words))}
+        tokens.update({word: index for index, word in enumerate(words)})
+        if binary:
+            # iterating over bytes yields ints, so does scanned buffer
+            tokens = {token.encode(): digit for token, digit in tokens.items()}
+        self.reverse = reverse
+        self.longest = max(map(len, tokens))
+        self.delta: list[dict[str | int, int]] = [{}]
+        # (token length, digit) of the longest token ending in given state
+        self.output: list[tuple[int, int] | None] = [None]
+        for token, digit in tokens.items():
+            state = 0
+            for char in reversed(token) if reverse else token:
+                if char not in self.delta[state]:
+                    self.delta.append({})
+                    self.output.append(None)
+                    self.delta[state][char] = len(self.delta) - 1
+                state = self.delta[state][char]
+            self.output[state] = (len(token), digit)
+        self.__link()
+
+    def __link(self):
+        # breadth first, turns the trie into complete automaton
+        fail = [0] * len(self.delta)
+        queue = list(self.delta[0].values())
+        for state in queue:
+            for char, next_state in self.delta[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and char not in self.delta[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = self.delta[fallback].get(char, 0)
+        for state in queue:
+            inherited = self.output[fail[state]]
+            if self.output[state] is None:
+                self.output[state] = inherited
+            for char, next_state in self.delta[fail[state]].items():
+                self.delta[state].setdefault(char, next_state)
+
+    def scan(self, line, start, stop, end=None):
+        # digit of the token starting first (forward) or last (reverse)
+        # among tokens starting in range(start, stop) and ending before end,
+        # None if there is none
+        end = len(line) if end is None else end
+        delta = self.delta
+        output = self.output
+        state = 0
+        found = None
+        found_at = -1
+        if self.reverse:
+            for ix in range(end - 1, start - 1, -1):
+                state = delta[state].get(line[ix], 0)
+                if output[state] is not None and ix < stop:
+                    return output[state][1]
+            return None
+        for ix in range(start, end):
+            if found is not None and ix >= found_at + self.longest:
+                break
+            state = delta[state].get(line[ix], 0)
+            if output[state] is None:
+                continue
+            length, digit = output[state]
+            token_start = ix - length + 1
+            if start <= token_start < stop and (
+                found is None or token_start < found_at
+            ):
+                found, found_at = digit, token_start
+        return found
+
+
+FORWARD_SCANNER = DigitScanner(MAPPING)
+REVERSE_SCANNER = DigitScanner(MAPPING, reverse=True)
+FORWARD_BYTES_SCANNER = DigitScanner(MAPPING, binary=True)
+REVERSE_BYTES_SCANNER = DigitScanner(MAPPING, reverse=True, binary=True)
+CHUNK_SIZE = 1 << 20
+# below that size spawning workers costs more than it saves
+PARALLEL_MIN_SIZE = 16 * CHUNK_SIZE
+
+
+def calibration_value(first, last):
+    # mirrors fst_lst_oo padding with "00" when digits are missing
+    if first is None:
+        return 10 * last if last is not None else 0
+    return 10 * first + last
+
+
+def summarize_scan(line):
+    # same as summarize, every line is read at most once in each direction
+    first = FORWARD_SCANNER.scan(line, 0, len(line) - 1)
+    last = REVERSE_SCANNER.scan(line, 0, len(line))
+    return calibration_value(first, last)
+
+
+def summarize_chunk(chunk: bytes) -> int:
+    # sum of summarize over all lines in chunk, without splitting it
+    summary = 0
+    start = 0
+    size = len(chunk)
+    while start < size:
+        end = chunk.find(b"\n", start) + 1 or size
+        first = FORWARD_BYTES_SCANNER.scan(chunk, start, end - 1, end)
+        last = REVERSE_BYTES_SCANNER.scan(chunk, start, end, end)
+        summary += calibration_value(first, last)
+        start = end
+    return summary
+
+
+def chunks(buffer, start, stop, chunk_size=CHUNK_SIZE):
+    # (start, end) ranges of about chunk_size bytes, each ending on a newline
+    while start < stop:
+        end = start + chunk_size
+        if end < stop:
+            end = buffer.find(b"\n", end - 1, stop) + 1 or stop
+        else:
+            end = stop
+        yield start, end
+        start = end
+
+
+def summarize_file(filename: Path, chunk_size=CHUNK_SIZE, start=0, end=None) -> int:
+    # memory mapped, only one chunk is held as bytes object at any time,
+    # start and end (byte offsets) have to be on line boundaries
+    with open(filename, "rb") as data_file:
+        if not data_file.seek(0, 2):
+            return 0
+        with mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            end = len(buffer) if end is None else end
+            return sum(
+                summarize_chunk(buffer[chunk_start:chunk_end])
+                for chunk_start, chunk_end in chunks(buffer, start, end, chunk_size)
+            )
+
+
+def summarize_shard(filename: Path, start: int, end: int) -> int:
+    return summarize_file(filename, start=start, end=end)
+
+
+def summarize_parallel(filename: Path, workers=None, min_size=PARALLEL_MIN_SIZE) -> int:
+    # file split by byte offsets on newlines, one shard per worker
+    workers = workers or os.cpu_count() or 1
+    size = os.path.getsize(filename)
+    if workers == 1 or not size or size < min_size:
+        return summarize_file(filename)
+    with open(filename, "rb") as data_file:
+        with mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            shards = list(chunks(buffer, 0, size, -(-size // workers)))
+    starts, ends = zip(*shards)
+    with ProcessPoolExecutor(min(workers, len(shards))) as executor:
+        return sum(executor.map(summarize_shard, repeat(filename), starts, ends))
+
+
+def summarize_array(data: np.ndarray) -> np.ndarray:
+    # calibration value of every line, data is a whole file as uint8 array
+    line_ends = np.flatnonzero(data == ord("\n")) + 1
+    if len(data) and data[-1] != ord("\n"):
+        line_ends = np.append(line_ends, len(data))
+
+    # start positions and values of all digits and digit names
+    positions = [np.flatnonzero((data >= ord("0")) & (data <= ord("9")))]
+    values = [data[positions[0]] - ord("0")]
+    for digit, word in enumerate(MAPPING):
+        word = np.frombuffer(word.encode(), dtype=np.uint8)
+        matches = np.ones(max(len(data) - len(word) + 1, 0), dtype=bool)
+        for shift, char in enumerate(word):
+            matches &= data[shift : shift + len(matches)] == char
+        positions.append(np.flatnonzero(matches))
+        values.append(np.full(len(positions[-1]), digit, dtype=np.uint8))
+    positions = np.concatenate(positions)
+    order = np.argsort(positions, kind="stable")
+    positions = positions[order]
+    values = np.concatenate(values)[order].astype(np.int64)
+    lines = np.searchsorted(line_ends, positions, side="right")
+
+    # last token of a line, first token not starting on its last character
+    last = np.full(len(line_ends), -1, dtype=np.int64)
+    is_last = np.diff(lines, append=len(line_ends)) != 0
+    last[lines[is_last]] = values[is_last]
+    forward = positions < line_ends[lines] - 1
+    lines, values = lines[forward], values[forward]
+    first = np.full(len(line_ends), -1, dtype=np.int64)
+    is_first = np.diff(lines, prepend=-1) != 0
+    first[lines[is_first]] = values[is_first]
+
+    return np.where(first >= 0, 10 * first + last, np.where(last >= 0, 10 * last, 0))
+
+
+def summarize_numpy(filename: Path) -> int:
+    data = np.fromfile(filename, dtype=np.uint8)
+    return int(summarize_array(data).sum())
+
+
 def main():
     current_dir = Path(__file__).parent.absolute()
     with open(current_dir / "data.txt") as data_file:
-        return sum(map(summarize, data_file))
+        return sum(map(summarize_scan, data_file))
+
+
+def main_bulk(chunk_size=CHUNK_SIZE):
+    current_dir = Path(__file__).parent.absolute()
+    return summarize_file(current_dir / "data.txt", chunk_size)
+
+
+def main_numpy():
+    current_dir = Path(__file__).parent.absolute()
+    return summarize_numpy(current_dir / "data.txt")
+
+
+def main_parallel(workers=None, min_size=PARALLEL_MIN_SIZE):
+    current_dir = Path(__file__).parent.absolute()
+    return summarize_parallel(current_dir / "data.txt", workers, min_size)
 
 
 if __name__ == "__main__":
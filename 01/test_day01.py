@@ -0,0 +1,58 @@
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+# loaded by path under its own name, every day has a main.py of its own
+spec = importlib.util.spec_from_file_location(
+    "day01", Path(__file__).parent / "main.py"
+)
+sys.modules["day01"] = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(sys.modules["day01"])
+
+from day01 import *
+
+EDGE_CASES = [
+    "",
+    "\n",
+    "\n\nabc\n\n",
+    "oneight\neightwo\ntwone\n",
+    "abc\nxyz\n7\n",
+    "two1nine\nnineight",
+    "sevenine\n1\nfive",
+    "one",
+]
+
+
+def engines(filename: Path) -> dict[str, int]:
+    with open(filename) as data_file:
+        scanned = sum(map(summarize_scan, data_file))
+    return {
+        "scan": scanned,
+        "file": summarize_file(filename),
+        "file_chunked": summarize_file(filename, chunk_size=4),
+        "parallel": summarize_parallel(filename, workers=2, min_size=0),
+        "numpy": summarize_numpy(filename),
+    }
+
+
+def expected(filename: Path) -> int:
+    with open(filename) as data_file:
+        return sum(map(summarize, data_file))
+
+
+def test_engines_example():
+    filename = Path(__file__).parent / "test.txt"
+    assert expected(filename) == 281
+    for engine, summary in engines(filename).items():
+        assert summary == 281, engine
+
+
+@pytest.mark.parametrize("text", EDGE_CASES)
+def test_engines_edge_cases(text, tmp_path):
+    filename = tmp_path / "data.txt"
+    filename.write_text(text)
+    summary = expected(filename)
+    for engine, engine_summary in engines(filename).items():
+        assert engine_summary == summary, engine
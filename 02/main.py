@@ -1,9 +1,19 @@
+import sys
+import time
+from array import array
 from pathlib import Path
+from typing import Iterable, NamedTuple, Optional, TextIO
+
+import numpy as np
 
 # only 12 red cubes, 13 green cubes, and 14 blue cubes
 BLUE_ALLOWED = 14
 RED_ALLOWED = 12
 GREEN_ALLOWED = 13
+COLORS = ("red", "green", "blue")
+# color id by first letter of its name, same order as COLORS
+COLOR_IDS = {"r": 0, "g": 1, "b": 2}
+DIGITS = {str(digit): digit for digit in range(10)}
 
 
 class Game:
@@ -44,6 +54,17 @@ class Game:
         self.__set_game_number(name)
         self.__set_game_sets(sets)
 
+    @classmethod
+    def from_line(cls, line: str) -> "Game":
+        game = cls.__new__(cls)
+        (
+            game.game_number,
+            game.max_red,
+            game.max_green,
+            game.max_blue,
+        ) = tokenize_game(line)
+        return game
+
     def __str__(self):
         return (
             f"Game {self.game_number}: POSSIBLE: {self.possible} POWER: {self.power}\n"
@@ -51,22 +72,242 @@ class Game:
         )
 
 
-def main():
+def parse_game(line: str) -> tuple[int, int, int, int]:
+    # game number, max red, max green, max blue
+    name, sets = line.split(":", 1)
+    maxima = dict.fromkeys(COLORS, 0)
+    for cube in sets.replace(";", ",").split(","):
+        count, color = cube.split()
+        count = int(count)
+        if count > maxima[color]:
+            maxima[color] = count
+    return int(name.split(" ", 1)[1]), *maxima.values()
+
+
+def tokenize_game(line: str) -> tuple[int, int, int, int]:
+    # single pass: digits accumulate count, first letter of a color name
+    # emits (color id, count) straight into maxima
+    maxima = [0, 0, 0]
+    game_number = 0
+    count = 0
+    for char in line:
+        digit = DIGITS.get(char)
+        if digit is not None:
+            count = count * 10 + digit
+        elif not count:
+            continue
+        elif char in COLOR_IDS:
+            color_id = COLOR_IDS[char]
+            if count > maxima[color_id]:
+                maxima[color_id] = count
+            count = 0
+        elif char == ":":
+            game_number = count
+            count = 0
+    return game_number, *maxima
+
+
+class GameStore:
+    # columnar storage of games, 4 bytes per attribute instead of an object
+    def __init__(self):
+        self.game_number = array("I")
+        self.max_red = array("I")
+        self.max_green = array("I")
+        self.max_blue = array("I")
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[str]) -> "GameStore":
+        store = cls()
+        for line in lines:
+            if line.strip():
+                store.append(*parse_game(line))
+        return store
+
+    def append(self, game_number: int, max_red: int, max_green: int, max_blue: int):
+        self.game_number.append(game_number)
+        self.max_red.append(max_red)
+        self.max_green.append(max_green)
+        self.max_blue.append(max_blue)
+
+    def __len__(self):
+        return len(self.game_number)
+
+    def __column(self, column: array) -> np.ndarray:
+        # zero copy view, must not outlive the call (array can't grow then)
+        return np.frombuffer(column, dtype=np.uint32)
+
+    def possible(
+        self, red=RED_ALLOWED, green=GREEN_ALLOWED, blue=BLUE_ALLOWED
+    ) -> np.ndarray:
+        return (
+            (self.__column(self.max_red) <= red)
+            & (self.__column(self.max_green) <= green)
+            & (self.__column(self.max_blue) <= blue)
+        )
+
+    def power(self) -> np.ndarray:
+        return (
+            self.__column(self.max_red).astype(np.uint64)
+            * self.__column(self.max_green)
+            * self.__column(self.max_blue)
+        )
+
+    def possible_sum(self, red=RED_ALLOWED, green=GREEN_ALLOWED, blue=BLUE_ALLOWED):
+        game_numbers = self.__column(self.game_number)
+        return int(game_numbers[self.possible(red, green, blue)].sum(dtype=np.uint64))
+
+    def power_sum(self) -> int:
+        return int(self.power().sum())
+
+
+class LimitIndex:
+    # 3-D dominance table: for every combination of distinct maxima the count
+    # and game number sum of games not exceeding it (coordinate compressed
+    # prefix sums), a query costs three binary searches and one lookup
+    def __init__(self, store: GameStore):
+        game_number = np.frombuffer(store.game_number, dtype=np.uint32)
+        columns = [
+            np.frombuffer(column, dtype=np.uint32)
+            for column in (store.max_red, store.max_green, store.max_blue)
+        ]
+        self.values = [np.unique(column) for column in columns]
+        coordinates = tuple(
+            np.searchsorted(values, column)
+            for values, column in zip(self.values, columns)
+        )
+        shape = tuple(map(len, self.values))
+        self.sums = np.zeros(shape, dtype=np.uint64)
+        self.counts = np.zeros(shape, dtype=np.uint64)
+        np.add.at(self.sums, coordinates, game_number.astype(np.uint64))
+        np.add.at(self.counts, coordinates, 1)
+        for axis in range(3):
+            self.sums.cumsum(axis=axis, out=self.sums)
+            self.counts.cumsum(axis=axis, out=self.counts)
+
+        # games ordered by max red, to list possible games red bound first
+        order = np.argsort(columns[0], kind="stable")
+        self.games = np.stack(
+            [game_number[order], *(column[order] for column in columns)]
+        )
+
+    def __locate(self, limits: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # table coordinates of limits (n, 3) and mask of non empty queries
+        coordinates = np.stack(
+            [
+                np.searchsorted(values, limits[:, axis], side="right") - 1
+                for axis, values in enumerate(self.values)
+            ]
+        )
+        return coordinates, (coordinates >= 0).all(axis=0)
+
+    def query_many(self, limits: Iterable[tuple[int, int, int]]) -> np.ndarray:
+        # (count, game number sum) of possible games for every (r, g, b) limit
+        limits = np.asarray(list(limits), dtype=np.int64).reshape(-1, 3)
+        if not self.counts.size:
+            return np.zeros((len(limits), 2), dtype=np.uint64)
+        coordinates, valid = self.__locate(limits)
+        coordinates = tuple(np.maximum(coordinates, 0))
+        return np.stack(
+            [
+                np.where(valid, self.counts[coordinates], 0),
+                np.where(valid, self.sums[coordinates], 0),
+            ],
+            axis=1,
+        )
+
+    def possible_count(self, red=RED_ALLOWED, green=GREEN_ALLOWED, blue=BLUE_ALLOWED):
+        return int(self.query_many([(red, green, blue)])[0, 0])
+
+    def possible_sum(self, red=RED_ALLOWED, green=GREEN_ALLOWED, blue=BLUE_ALLOWED):
+        return int(self.query_many([(red, green, blue)])[0, 1])
+
+    def possible_games(
+        self, red=RED_ALLOWED, green=GREEN_ALLOWED, blue=BLUE_ALLOWED
+    ) -> np.ndarray:
+        game_number, max_red, max_green, max_blue = self.games
+        stop = np.searchsorted(max_red, red, side="right")
+        mask = (max_green[:stop] <= green) & (max_blue[:stop] <= blue)
+        return np.sort(game_number[:stop][mask])
+
+
+class Snapshot(NamedTuple):
+    games: int
+    possible_sum: int
+    power_sum: int
+
+
+class GameAggregator:
+    # running totals over a stream of games, constant work per line
+    def __init__(
+        self,
+        red=RED_ALLOWED,
+        green=GREEN_ALLOWED,
+        blue=BLUE_ALLOWED,
+        progress_interval: Optional[float] = None,
+        progress_file: TextIO = sys.stderr,
+    ):
+        self.limits = (red, green, blue)
+        self.games = 0
+        self.possible_sum = 0
+        self.power_sum = 0
+        # seconds between progress lines, no progress when None
+        self.progress_interval = progress_interval
+        self.progress_file = progress_file
+        self.__last_progress = time.monotonic()
+
+    def add(self, line: str):
+        if not line.strip():
+            return
+        game_number, *maxima = parse_game(line)
+        red, green, blue = maxima
+        self.games += 1
+        self.power_sum += red * green * blue
+        if all(count <= limit for count, limit in zip(maxima, self.limits)):
+            self.possible_sum += game_number
+
+    def consume(self, lines: Iterable[str]) -> Snapshot:
+        for line in lines:
+            self.add(line)
+            if self.progress_interval is not None:
+                self.__progress()
+        return self.snapshot()
+
+    def snapshot(self) -> Snapshot:
+        return Snapshot(self.games, self.possible_sum, self.power_sum)
+
+    def __progress(self):
+        now = time.monotonic()
+        if now - self.__last_progress >= self.progress_interval:
+            self.__last_progress = now
+            print(f"Summary: {self.snapshot()}", file=self.progress_file)
+
+
+def main(progress_interval: Optional[float] = None):
     current_dir = Path(__file__).parent.absolute()
-    summary = 0
+    aggregator = GameAggregator(progress_interval=progress_interval)
     with open(current_dir / "data.txt") as data_file:
-        for line in data_file:
-            game, all_game_sets = line.split(":", 1)
-            game = Game(game, all_game_sets)
-            summary += game.power
-            # if game.possible:
-            #     summary += game.game_number
-            print(f"Summary: {summary}")
+        return aggregator.consume(data_file)
+
+
+def benchmark(count=10**6):
+    import timeit
+
+    current_dir = Path(__file__).parent.absolute()
+    with open(current_dir / "data.txt") as data_file:
+        lines = data_file.readlines()
+    lines = (lines * (count // len(lines) + 1))[:count]
+    split = timeit.timeit(
+        lambda: [Game(*line.split(":", 1)) for line in lines], number=1
+    )
+    tokenized = timeit.timeit(lambda: list(map(Game.from_line, lines)), number=1)
+    print(f"split: {split:.3f}s tokenizer: {tokenized:.3f}s ({count} lines)")
 
 
 if __name__ == "__main__":
     print(main())
 
+    # benchmark()
+
     # import timeit
     # t = timeit.Timer("main()", setup="from __main__ import main")
     # print(sorted(t.repeat(3, 1000)))
@@ -0,0 +1,52 @@
+import importlib.util
+import itertools
+import sys
+from pathlib import Path
+
+import pytest
+
+# loaded by path under its own name, every day has a main.py of its own
+spec = importlib.util.spec_from_file_location(
+    "day02", Path(__file__).parent / "main.py"
+)
+sys.modules["day02"] = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(sys.modules["day02"])
+
+from day02 import *
+
+
+def read_lines() -> list[str]:
+    with open(Path(__file__).parent / "test.txt") as data_file:
+        return data_file.readlines()
+
+
+def test_parsers_agree_with_game():
+    for line in read_lines():
+        game = Game(*line.split(":", 1))
+        expected = (game.game_number, game.max_red, game.max_green, game.max_blue)
+        assert parse_game(line) == tokenize_game(line) == expected
+        from_line = Game.from_line(line)
+        assert (from_line.possible, from_line.power) == (game.possible, game.power)
+
+
+def test_limit_index_agrees_with_game():
+    lines = read_lines()
+    games = [Game(*line.split(":", 1)) for line in lines]
+    store = GameStore.from_lines(lines)
+    index = LimitIndex(store)
+    limits = list(itertools.product(range(0, 22, 3), repeat=3))
+
+    results = index.query_many(limits)
+    for (red, green, blue), (count, summary) in zip(limits, results):
+        possible = [
+            game.game_number
+            for game in games
+            if game.max_red <= red and game.max_green <= green and game.max_blue <= blue
+        ]
+        assert (count, summary) == (len(possible), sum(possible))
+        assert list(index.possible_games(red, green, blue)) == possible
+        assert store.possible_sum(red, green, blue) == sum(possible)
+
+    possible = [game.game_number for game in games if game.possible]
+    assert index.possible_sum() == store.possible_sum() == sum(possible) == 8
+    assert list(index.possible_games()) == possible
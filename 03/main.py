@@ -1,9 +1,17 @@
 import dataclasses
+import os
+import re
 import string
+from array import array
+from bisect import bisect_right
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from functools import partial
+from itertools import repeat
 from pathlib import Path
-from typing import Generator, Iterable, Optional
+from typing import Generator, Iterable, NamedTuple, Optional
+
+import numpy as np
 
 
 @dataclasses.dataclass(eq=True, frozen=True)
@@ -46,6 +54,443 @@ class Number:
         return bool(self.value)
 
 
+class Point(NamedTuple):
+    # tuple backed Position
+    row: int
+    col: int
+
+
+@dataclasses.dataclass(slots=True)
+class SlotSymbol:
+    position: Point
+    char: str
+
+
+class Span(NamedTuple):
+    # tuple backed Number, col_end is exclusive
+    row: int
+    col_start: int
+    col_end: int
+    numeric: int
+
+    @property
+    def adjacents(self) -> list[Point]:
+        col_wide = range(self.col_start - 1, self.col_end + 1)
+        return [
+            *[Point(self.row - 1, col) for col in col_wide],
+            Point(self.row, self.col_start - 1),
+            Point(self.row, self.col_end),
+            *[Point(self.row + 1, col) for col in col_wide],
+        ]
+
+
+class SpanIndex:
+    # number spans bucketed by row, every bucket sorted by col_start, spans
+    # in a row are disjoint so they are sorted by col_end as well
+    def __init__(self, spans: Iterable[Span], symbols: Iterable[SlotSymbol] = ()):
+        self.rows: dict[int, list[Span]] = defaultdict(list)
+        for span in sorted(spans):
+            self.rows[span.row].append(span)
+        self.starts = {
+            row: [span.col_start for span in row_spans]
+            for row, row_spans in self.rows.items()
+        }
+        self.symbols = list(symbols)
+        self._degrees: dict[str, dict[int, list[SlotSymbol]]] = {}
+
+    def around(self, row: int, col: int) -> list[Span]:
+        # spans touching cell, costs a bisect per row plus size of the output
+        found = []
+        for near_row in (row - 1, row, row + 1):
+            if near_row not in self.starts:
+                continue
+            spans = self.rows[near_row]
+            stop = start = bisect_right(self.starts[near_row], col + 1)
+            while start and spans[start - 1].col_end >= col:
+                start -= 1
+            found.extend(spans[start:stop])
+        return found
+
+    def with_neighbours(self, count: int, char="*") -> list[SlotSymbol]:
+        # symbols with exactly count adjacent numbers, buckets built once
+        if char not in self._degrees:
+            degrees = self._degrees[char] = defaultdict(list)
+            for symbol in self.symbols:
+                if symbol.char == char:
+                    degree = len(self.around(*symbol.position))
+                    degrees[degree].append(symbol)
+        return self._degrees[char].get(count, [])
+
+
+class Schematic:
+    # editable schematic, part1 and part2 sums are kept up to date by
+    # touching only numbers and gears around edited cell
+    def __init__(self, lines: Iterable[str]):
+        self.cells = [list(line.rstrip("\n")) for line in lines]
+        self.height = len(self.cells)
+        self.width = len(self.cells[0]) if self.cells else 0
+        self.owners: dict[Point, Span] = {}
+        self.gears: dict[Span, Optional[Point]] = {}
+        self.gear_numbers: dict[Point, set[Span]] = defaultdict(set)
+        self.part1 = 0
+        self.part2 = 0
+        for row, cells in enumerate(self.cells):
+            for col in range(len(cells)):
+                if cells[col].isdigit() and (col == 0 or not cells[col - 1].isdigit()):
+                    self.__add(self.__span(row, col))
+
+    @classmethod
+    def from_file(cls, filename: Path) -> "Schematic":
+        with open(filename) as data_file:
+            return cls(data_file)
+
+    def set_cell(self, row: int, col: int, char: str):
+        if not (0 <= row < self.height and 0 <= col < self.width):
+            raise IndexError(f"Cell {row}, {col} outside of schematic")
+        if len(char) != 1 or char == "\n":
+            raise ValueError(f"Invalid cell value {char!r}")
+        neighbourhood = [
+            Point(near_row, near_col)
+            for near_row in range(row - 1, row + 2)
+            for near_col in range(col - 1, col + 2)
+        ]
+        affected = {
+            self.owners[position]
+            for position in neighbourhood
+            if position in self.owners
+        }
+        for span in affected:
+            self.__remove(span)
+        self.cells[row][col] = char
+        # numbers in other rows keep their cells, edited row may split or merge
+        spans = {span for span in affected if span.row != row}
+        for near_col in range(max(col - 1, 0), min(col + 2, self.width)):
+            if self.cells[row][near_col].isdigit():
+                spans.add(self.__span(row, near_col))
+        for span in spans:
+            self.__add(span)
+
+    def __span(self, row: int, col: int) -> Span:
+        # whole number around digit at (row, col)
+        cells = self.cells[row]
+        col_start = col_end = col
+        while col_start > 0 and cells[col_start - 1].isdigit():
+            col_start -= 1
+        while col_end < self.width and cells[col_end].isdigit():
+            col_end += 1
+        return Span(row, col_start, col_end, int("".join(cells[col_start:col_end])))
+
+    def __char(self, position: Point) -> str:
+        if 0 <= position.row < self.height and 0 <= position.col < self.width:
+            return self.cells[position.row][position.col]
+        return "."
+
+    def __gear_product(self, gear: Point) -> int:
+        numbers = self.gear_numbers[gear]
+        if len(numbers) != 2:
+            return 0
+        first, second = numbers
+        return first.numeric * second.numeric
+
+    def __add(self, span: Span):
+        for col in range(span.col_start, span.col_end):
+            self.owners[Point(span.row, col)] = span
+        chars = [self.__char(position) for position in span.adjacents]
+        if any(char not in string.digits + "." for char in chars):
+            self.part1 += span.numeric
+        gear = next(
+            (position for position, char in zip(span.adjacents, chars) if char == "*"),
+            None,
+        )
+        self.gears[span] = gear
+        if gear is not None:
+            self.part2 -= self.__gear_product(gear)
+            self.gear_numbers[gear].add(span)
+            self.part2 += self.__gear_product(gear)
+
+    def __remove(self, span: Span):
+        for col in range(span.col_start, span.col_end):
+            del self.owners[Point(span.row, col)]
+        if any(
+            self.__char(position) not in string.digits + "."
+            for position in span.adjacents
+        ):
+            self.part1 -= span.numeric
+        gear = self.gears.pop(span)
+        if gear is not None:
+            self.part2 -= self.__gear_product(gear)
+            self.gear_numbers[gear].discard(span)
+            self.part2 += self.__gear_product(gear)
+            if not self.gear_numbers[gear]:
+                del self.gear_numbers[gear]
+
+    def __str__(self):
+        return "".join("".join(cells) + "\n" for cells in self.cells)
+
+
+# a number or a single symbol, one regex pass finds both
+NUMBER_OR_SYMBOL = re.compile(rb"(\d+)|[^\d.\n]")
+NOT_SYMBOLS = frozenset(b"0123456789.\n")
+# smaller schematics are not worth spawning processes for
+PARALLEL_MIN_ROWS = 4096
+
+
+@dataclasses.dataclass
+class Grid:
+    # row-major bytes of schematic, every row is width long (with newline),
+    # number spans are (row, col_start, col_end, value), col_end exclusive
+    data: bytes
+    width: int
+    height: int
+    symbol_rows: array = dataclasses.field(default_factory=lambda: array("l"))
+    symbol_cols: array = dataclasses.field(default_factory=lambda: array("l"))
+    number_rows: array = dataclasses.field(default_factory=lambda: array("l"))
+    number_col_starts: array = dataclasses.field(default_factory=lambda: array("l"))
+    number_col_ends: array = dataclasses.field(default_factory=lambda: array("l"))
+    number_values: array = dataclasses.field(default_factory=lambda: array("q"))
+
+    def symbols(self) -> Generator[SlotSymbol, None, None]:
+        for row, col in zip(self.symbol_rows, self.symbol_cols):
+            yield SlotSymbol(Point(row, col), chr(self.data[row * self.width + col]))
+
+    def numbers(self) -> Generator[Span, None, None]:
+        yield from map(Span._make, self.spans)
+
+    @property
+    def spans(self) -> Iterable[tuple[int, int, int, int]]:
+        return zip(
+            self.number_rows,
+            self.number_col_starts,
+            self.number_col_ends,
+            self.number_values,
+        )
+
+    def adjacents(self, row: int, col_start: int, col_end: int) -> Iterable[int]:
+        # offsets around span in the same order as Number.adjacents
+        left = max(col_start - 1, 0)
+        right = min(col_end, self.width - 1)
+        if row > 0:
+            yield from range(
+                (row - 1) * self.width + left, (row - 1) * self.width + right + 1
+            )
+        if col_start > 0:
+            yield row * self.width + col_start - 1
+        yield row * self.width + col_end
+        if row + 1 < self.height:
+            yield from range(
+                (row + 1) * self.width + left, (row + 1) * self.width + right + 1
+            )
+
+    def adjacent_symbol(self, row: int, col_start: int, col_end: int, chars=None):
+        # offset of first adjacent symbol (one of chars if given) or None
+        for offset in self.adjacents(row, col_start, col_end):
+            char = self.data[offset]
+            if char not in NOT_SYMBOLS and (chars is None or char in chars):
+                return offset
+        return None
+
+    def part1(self, rows: Optional[range] = None) -> int:
+        # only numbers in given rows are counted, when rows are given
+        return sum(
+            value
+            for row, col_start, col_end, value in self.spans
+            if (rows is None or row in rows)
+            and self.adjacent_symbol(row, col_start, col_end) is not None
+        )
+
+    def gear_numbers(self, rows: Optional[range] = None) -> dict[int, list[int]]:
+        # gear offset to values of numbers for which it is first adjacent gear
+        gear_numbers: dict[int, list[int]] = defaultdict(list)
+        for row, col_start, col_end, value in self.spans:
+            if rows is not None and row not in rows:
+                continue
+            gear = self.adjacent_symbol(row, col_start, col_end, b"*")
+            if gear is not None:
+                gear_numbers[gear].append(value)
+        return gear_numbers
+
+    def part2(self) -> int:
+        return gear_sum(self.gear_numbers())
+
+
+def gear_sum(gear_numbers: dict[int, list[int]]) -> int:
+    return sum(
+        values[0] * values[1] for values in gear_numbers.values() if len(values) == 2
+    )
+
+
+def load_grid(filename: Path) -> Grid:
+    # single read and single scan for both symbols and numbers
+    with open(filename, "rb") as data_file:
+        return parse_grid(data_file.read())
+
+
+def parse_grid(data: bytes) -> Grid:
+    if not data.endswith(b"\n"):
+        data += b"\n"
+    width = data.index(b"\n") + 1
+    grid = Grid(data, width, len(data) // width)
+    for match in NUMBER_OR_SYMBOL.finditer(data):
+        row, col = divmod(match.start(), width)
+        if match.lastindex:
+            grid.number_rows.append(row)
+            grid.number_col_starts.append(col)
+            grid.number_col_ends.append(col + match.end() - match.start())
+            grid.number_values.append(int(match[0]))
+        else:
+            grid.symbol_rows.append(row)
+            grid.symbol_cols.append(col)
+    return grid
+
+
+def score_band(
+    filename: Path, width: int, first_row: int, stop_row: int
+) -> tuple[int, dict[int, list[int]]]:
+    # part1 sum and gear numbers of rows [first_row, stop_row), one halo row
+    # is read on each side, gears are keyed by offset in the whole file
+    halo_row = max(first_row - 1, 0)
+    with open(filename, "rb") as data_file:
+        data_file.seek(halo_row * width)
+        grid = parse_grid(data_file.read((stop_row + 1 - halo_row) * width))
+    rows = range(first_row - halo_row, stop_row - halo_row)
+    gear_numbers = {
+        gear + halo_row * width: values
+        for gear, values in grid.gear_numbers(rows).items()
+    }
+    return grid.part1(rows), gear_numbers
+
+
+def solve_parallel(
+    filename: Path, workers=None, min_rows=PARALLEL_MIN_ROWS
+) -> tuple[int, int]:
+    # part1 and part2 from row bands scored in separate processes
+    workers = workers or os.cpu_count() or 1
+    with open(filename, "rb") as data_file:
+        first_line = data_file.readline()
+        size = data_file.seek(0, 2)
+    width = len(first_line)
+    height = -(-size // width) if width else 0
+    if workers == 1 or height < min_rows or not first_line.endswith(b"\n"):
+        grid = load_grid(filename)
+        return grid.part1(), grid.part2()
+
+    band = -(-height // workers)
+    first_rows = range(0, height, band)
+    stop_rows = [min(first_row + band, height) for first_row in first_rows]
+    summary = 0
+    gear_numbers: dict[int, list[int]] = defaultdict(list)
+    with ProcessPoolExecutor(len(first_rows)) as executor:
+        results = executor.map(
+            score_band, repeat(filename), repeat(width), first_rows, stop_rows
+        )
+        for band_summary, band_gear_numbers in results:
+            summary += band_summary
+            # gear on band boundary collects numbers from both bands
+            for gear, values in band_gear_numbers.items():
+                gear_numbers[gear].extend(values)
+    return summary, gear_sum(gear_numbers)
+
+
+def memory_benchmark(tiles=100):
+    # peak memory of whole schematic held as objects, data.txt tiled down
+    import tempfile
+    import tracemalloc
+
+    filename = Path(__file__).parent.absolute() / "data.txt"
+    with open(filename) as data_file, tempfile.TemporaryDirectory() as tmp:
+        large = Path(tmp) / "data.txt"
+        large.write_text(data_file.read() * tiles)
+        loaders = {
+            "dataclass": lambda: (
+                list(get_symbols(large)),
+                list(get_numbers(large)),
+            ),
+            "slots/tuple": lambda: (
+                list((grid := load_grid(large)).symbols()),
+                list(grid.numbers()),
+            ),
+        }
+        for name, loader in loaders.items():
+            tracemalloc.start()
+            symbols, numbers = loader()
+            size, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(
+                f"{name}: {len(symbols)} symbols {len(numbers)} numbers "
+                f"held {size / 2**20:.1f} MiB peak {peak / 2**20:.1f} MiB"
+            )
+            del symbols, numbers
+
+
+def dilate(mask: np.ndarray) -> np.ndarray:
+    # cells with any marked cell among 3x3 neighbourhood
+    height, width = mask.shape
+    padded = np.pad(mask, 1)
+    dilated = np.zeros_like(mask)
+    for row_shift in range(3):
+        for col_shift in range(3):
+            dilated |= padded[
+                row_shift : row_shift + height, col_shift : col_shift + width
+            ]
+    return dilated
+
+
+def solve_numpy(grid: Grid) -> tuple[int, int]:
+    # part1 and part2 at once, newline column keeps numbers from wrapping
+    cells = np.frombuffer(grid.data, dtype=np.uint8).reshape(grid.height, grid.width)
+    digits = (cells >= ord("0")) & (cells <= ord("9"))
+    symbols = ~digits & (cells != ord(".")) & (cells != ord("\n"))
+    near_symbol = dilate(symbols).ravel()
+    cells, digits = cells.ravel(), digits.ravel()
+
+    # label every digit with index of its number span
+    is_start = digits & ~np.r_[False, digits[:-1]]
+    span_starts = np.flatnonzero(is_start)
+    span_ends = np.flatnonzero(digits & ~np.r_[digits[1:], False]) + 1
+    labels = np.cumsum(is_start) - 1
+    labels[~digits] = -1
+    digit_offsets = np.flatnonzero(digits)
+    if not len(digit_offsets):
+        return 0, 0
+    first_digits = np.searchsorted(digit_offsets, span_starts)
+    places = span_ends[labels[digit_offsets]] - 1 - digit_offsets
+    # int64 holds up to 18 digits, longer numbers are kept as python ints
+    dtype = np.int64 if (span_ends - span_starts).max() <= 18 else object
+    values = np.add.reduceat(
+        (cells[digit_offsets] - ord("0")).astype(dtype)
+        * np.power(10, places.astype(dtype)),
+        first_digits,
+    )
+    # sums and products may not fit int64 even when values do
+    values = values.astype(object)
+    touched = np.logical_or.reduceat(near_symbol[digit_offsets], first_digits)
+    summary_part1 = sum(values[touched])
+
+    # number belongs to its first adjacent gear, which is the lowest offset
+    gears = np.flatnonzero(cells == ord("*"))
+    neighbours = [
+        gears + row_shift * grid.width + col_shift
+        for row_shift in (-1, 0, 1)
+        for col_shift in (-1, 0, 1)
+        if row_shift or col_shift
+    ]
+    neighbours = np.concatenate(neighbours)
+    owners = np.tile(gears, 8)
+    inside = (neighbours >= 0) & (neighbours < len(cells))
+    neighbour_labels = labels[neighbours[inside]]
+    owners = owners[inside][neighbour_labels >= 0]
+    neighbour_labels = neighbour_labels[neighbour_labels >= 0]
+    order = np.argsort(owners, kind="stable")
+    numbers, first = np.unique(neighbour_labels[order], return_index=True)
+    owners = owners[order][first]
+    order = np.argsort(owners, kind="stable")
+    owners, numbers = owners[order], numbers[order]
+    _, gear_starts, counts = np.unique(owners, return_index=True, return_counts=True)
+    pairs = gear_starts[counts == 2]
+    summary_part2 = sum(values[numbers[pairs]] * values[numbers[pairs + 1]])
+    return summary_part1, summary_part2
+
+
 def get_symbols(filename: Path) -> Generator[Symbol, None, None]:
     # use separate file cursors
     with open(filename) as data_file:
@@ -94,9 +539,11 @@ def get_numbers_around_gears(
 
 
 def part1(
-    symbols: Iterable[Symbol],
-    numbers: Iterable[Number],
+    symbols: Iterable[Symbol] | Grid,
+    numbers: Optional[Iterable[Number]] = None,
 ) -> int:
+    if isinstance(symbols, Grid):
+        return symbols.part1()
     all_symbols = {symbol.position: symbol for symbol in symbols}
     adjacent_numbers = filter(
         partial(find_adjacent_symbols, symbols=all_symbols), numbers
@@ -105,7 +552,12 @@ def part1(
     return summary
 
 
-def part2(symbols: Iterable[Symbol], numbers: Iterable[Number]) -> int:
+def part2(
+    symbols: Iterable[Symbol] | Grid,
+    numbers: Optional[Iterable[Number]] = None,
+) -> int:
+    if isinstance(symbols, Grid):
+        return symbols.part2()
     gear_symbols = {
         symbol.position: symbol
         for symbol in filter(lambda symbol: symbol.char == "*", symbols)
@@ -115,22 +567,23 @@ def part2(symbols: Iterable[Symbol], numbers: Iterable[Number]) -> int:
         lambda values: values[0].numeric * values[1].numeric, gear_number_pairs
     )
     summary = sum(gear_number_products)
-    assert summary == 84900879, summary
     return summary
 
 
 def main():
     filename = Path(__file__).parent.absolute() / "data.txt"
-    symbols = get_symbols(filename)
-    numbers = get_numbers(filename)
-    # summary = part1(symbols, numbers)
-    summary = part2(symbols, numbers)
+    grid = load_grid(filename)
+    # summary = part1(grid)
+    summary = part2(grid)
+    assert summary == 84900879, summary
     return summary
 
 
 if __name__ == "__main__":
     print(main())
 
+    # memory_benchmark()
+
     # import timeit
     # t = timeit.Timer("main()", setup="from __main__ import main")
     # print(sorted(t.repeat(3, 1000)))
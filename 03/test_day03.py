@@ -0,0 +1,100 @@
+import importlib.util
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+# loaded by path under its own name, every day has a main.py of its own
+spec = importlib.util.spec_from_file_location(
+    "day03", Path(__file__).parent / "main.py"
+)
+sys.modules["day03"] = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(sys.modules["day03"])
+
+from day03 import *
+
+
+def full_recompute(schematic: Schematic, filename: Path) -> tuple[int, int]:
+    filename.write_text(str(schematic))
+    return (
+        part1(get_symbols(filename), get_numbers(filename)),
+        part2(get_symbols(filename), get_numbers(filename)),
+    )
+
+
+def test_schematic_from_file():
+    filename = Path(__file__).parent.absolute() / "test.txt"
+    schematic = Schematic.from_file(filename)
+    assert (schematic.part1, schematic.part2) == (4361, 467835)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_schematic_set_cell(seed, tmp_path):
+    generator = random.Random(seed)
+    chars = "......0123456789*#"
+    lines = [
+        "".join(generator.choice(chars) for _ in range(12)) + "\n" for _ in range(10)
+    ]
+    schematic = Schematic(lines)
+    filename = tmp_path / "data.txt"
+    assert (schematic.part1, schematic.part2) == full_recompute(schematic, filename)
+    for _ in range(100):
+        schematic.set_cell(
+            generator.randrange(10), generator.randrange(12), generator.choice(chars)
+        )
+        assert (schematic.part1, schematic.part2) == full_recompute(schematic, filename)
+
+
+def test_solve_numpy_long_numbers(tmp_path):
+    filename = tmp_path / "data.txt"
+    filename.write_text(
+        "123456789012345.....\n"
+        "...............*....\n"
+        "....987654321098765.\n"
+        "99999999999999999999\n"
+    )
+    grid = Grid(filename.read_bytes(), 21, 4)
+
+    assert solve_numpy(grid) == (
+        part1(get_symbols(filename), get_numbers(filename)),
+        part2(get_symbols(filename), get_numbers(filename)),
+    )
+
+
+@pytest.mark.parametrize("workers", [2, 4])
+def test_solve_parallel_band_boundary(workers, tmp_path):
+    # gears on rows 1 and 2 take one number from each of two bands
+    filename = tmp_path / "data.txt"
+    filename.write_text("12........\n..*...78..\n..34...*..\n.......9..\n")
+
+    assert solve_parallel(filename, workers, min_rows=0) == (
+        part1(get_symbols(filename), get_numbers(filename)),
+        part2(get_symbols(filename), get_numbers(filename)),
+    )
+    assert solve_parallel(filename, workers, min_rows=0)[1] == 12 * 34 + 78 * 9
+
+
+def test_span_index():
+    grid = load_grid(Path(__file__).parent.absolute() / "test.txt")
+    spans = list(grid.numbers())
+    symbols = list(grid.symbols())
+    index = SpanIndex(spans, symbols)
+
+    def touching(row, col):
+        return [
+            span
+            for span in spans
+            if abs(span.row - row) <= 1 and span.col_start - 1 <= col <= span.col_end
+        ]
+
+    for row in range(-1, grid.height + 1):
+        for col in range(-1, grid.width + 1):
+            assert sorted(index.around(row, col)) == sorted(touching(row, col))
+    for count in range(4):
+        assert index.with_neighbours(count) == [
+            symbol
+            for symbol in symbols
+            if symbol.char == "*" and len(touching(*symbol.position)) == count
+        ]
+    assert len(index.with_neighbours(2)) == 2
@@ -1,13 +1,10 @@
 import dataclasses
-from functools import reduce
+from functools import cached_property, reduce
 from pathlib import Path
 from pprint import pprint
 from time import sleep
 
-CARD = (0, 8)
-WINING = (10, 39)
-NUMBERS = (42, 116)
-NUMBER_WIDTH = 3
+import numpy as np
 
 
 @dataclasses.dataclass
@@ -29,54 +26,227 @@ class Card:
         return reduce(lambda x, _: 1 if x == 0 else x * 2, self.matches, 0)
 
 
-def split(input_string, width=NUMBER_WIDTH):
-    yield from (
-        int(input_string[i : i + width]) for i in range(0, len(input_string), width)
-    )
+@dataclasses.dataclass(frozen=True)
+class Layout:
+    # column ranges of card name, wining numbers and numbers and the width of
+    # a single number field (with its leading spaces), inferred from a line
+    card: tuple[int, int]
+    wining: tuple[int, int]
+    numbers: tuple[int, int]
+    width: int
+
+    @classmethod
+    def from_line(cls, line: str) -> "Layout":
+        colon = line.index(":")
+        bar = line.index("|", colon)
+        first_digit = len(line) - len(line[colon + 1 :].lstrip())
+        return cls(
+            card=(0, colon),
+            wining=(colon + 1, bar),
+            numbers=(bar + 1, len(line.rstrip("\n"))),
+            width=line.index(" ", first_digit) - colon - 1,
+        )
+
+    @cached_property
+    def wining_slices(self) -> list[slice]:
+        return self.__slices(*self.wining)
+
+    @cached_property
+    def numbers_slices(self) -> list[slice]:
+        return self.__slices(*self.numbers)
+
+    def __slices(self, start, stop) -> list[slice]:
+        # whole fields only, trailing space before "|" is skipped
+        stop -= (stop - start) % self.width
+        return [
+            slice(field, field + self.width) for field in range(start, stop, self.width)
+        ]
+
+    def parse(self, line: str) -> "Card":
+        return Card(
+            line[slice(*self.card)],
+            [int(line[field]) for field in self.numbers_slices],
+            {int(line[field]) for field in self.wining_slices},
+        )
+
+
+def read_cards(filename: Path):
+    # layout is taken from first line and applied to all of them
+    with open(filename) as data_file:
+        layout = None
+        for line in data_file:
+            layout = layout or Layout.from_line(line)
+            yield layout.parse(line)
 
 
-def part1(filename: Path):
-    summary = 0
+@dataclasses.dataclass
+class BitsetCard:
+    # bit n is set when number n is on the card, numbers are below 100 and
+    # card numbers are unique (Card matches a repeat once per repeat, a bitmask
+    # can't), read_bitset_cards raises ValueError on repeats
+    name: str
+    numbers: int
+    winning_numbers: int
+
+    @cached_property
+    def matches_count(self):
+        return (self.numbers & self.winning_numbers).bit_count()
+
+    @property
+    def value(self):
+        return 1 << self.matches_count - 1 if self.matches_count else 0
+
+
+def bitmask(numbers):
+    mask = 0
+    for number in numbers:
+        mask |= 1 << number
+    return mask
+
+
+def read_bitset_cards(filename: Path):
     with open(filename) as data_file:
+        layout = None
         for line in data_file:
-            card_name = line[CARD[0] : CARD[1]]
-            winning_numbers = set(split(line[WINING[0] : WINING[1]]))
-            numbers = list(split(line[NUMBERS[0] : NUMBERS[1]]))
+            layout = layout or Layout.from_line(line)
+            name = line[slice(*layout.card)]
+            numbers = bitmask(int(line[field]) for field in layout.numbers_slices)
+            if numbers.bit_count() != len(layout.numbers_slices):
+                raise ValueError(f"Repeated numbers on {name}")
+            yield BitsetCard(
+                name,
+                numbers,
+                bitmask(int(line[field]) for field in layout.wining_slices),
+            )
+
+
+def split_columns(lines: np.ndarray, start, stop, width):
+    # numbers of fixed width fields of every line, lines as 2-D uint8 array
+    offsets = np.arange(start, stop - (stop - start) % width, width)
+    numbers = np.zeros((len(lines), len(offsets)), dtype=np.int64)
+    for shift in range(width):
+        columns = offsets + shift
+        chars = lines[:, np.minimum(columns, stop - 1)]
+        is_digit = (chars >= ord("0")) & (chars <= ord("9")) & (columns < stop)
+        numbers = np.where(is_digit, numbers * 10 + chars - ord("0"), numbers)
+    return numbers
+
+
+def score_cards(filename: Path) -> tuple[np.ndarray, np.ndarray]:
+    # matches count and value of every card in one vectorized pass
+    with open(filename) as data_file:
+        line = data_file.readline()
+    if not line:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    layout = Layout.from_line(line)
+    data = np.fromfile(filename, dtype=np.uint8)
+    if len(data) and data[-1] != ord("\n"):
+        data = np.append(data, np.uint8(ord("\n")))
+    width = int(np.argmax(data == ord("\n"))) + 1
+    lines = data.reshape(-1, width)
+    winning_numbers = split_columns(lines, *layout.wining, layout.width)
+    numbers = split_columns(lines, *layout.numbers, layout.width)
+
+    rows = np.arange(len(lines))[:, np.newaxis]
+    is_winning = np.zeros((len(lines), 100), dtype=bool)
+    is_winning[rows, winning_numbers] = True
+    matches_counts = is_winning[rows, numbers].sum(axis=1)
+    values = np.where(matches_counts > 0, 1 << np.maximum(matches_counts - 1, 0), 0)
+    return matches_counts, values
 
-            card = Card(card_name, numbers, winning_numbers)
 
-            summary += card.value
-    assert summary == 20107
+def part1(filename: Path):
+    summary = 0
+    for card in read_cards(filename):
+        summary += card.value
     return summary
 
 
 def part2(filename: Path):
     card_sets: list[list[Card]] = []
     summary = 0
-    with open(filename) as data_file:
-        for line in data_file:
-            card_name = line[CARD[0] : CARD[1]]
-            winning_numbers = set(split(line[WINING[0] : WINING[1]]))
-            numbers = list(split(line[NUMBERS[0] : NUMBERS[1]]))
-
-            card = Card(card_name, numbers, winning_numbers)
-            card_sets.append([card])
+    for card in read_cards(filename):
+        card_sets.append([card])
 
     for set_idx, card_set in enumerate(card_sets):
         for card in card_set:
             if not card.matches_count:
                 continue
-            for shift in range(1, card.matches_count +1):
+            for shift in range(1, card.matches_count + 1):
                 card_sets[set_idx + shift].append(card_sets[set_idx + shift][0])
 
     summary = sum(map(len, card_sets))
-    assert summary == 8172507
     return summary
 
+
+def count_copies(matches_counts: list[int]) -> int:
+    # one multiplicity per card, copies are spread with a difference array
+    cards = len(matches_counts)
+    difference = [0] * (cards + 1)
+    extra_copies = 0
+    summary = 0
+    for card_idx, matches_count in enumerate(matches_counts):
+        extra_copies += difference[card_idx]
+        copies = 1 + extra_copies
+        summary += copies
+        if matches_count:
+            difference[card_idx + 1] += copies
+            difference[min(card_idx + matches_count + 1, cards)] -= copies
+    return summary
+
+
+def part2_counting(filename: Path):
+    matches_counts = [card.matches_count for card in read_cards(filename)]
+    summary = count_copies(matches_counts)
+    return summary
+
+
+def part2_streaming(filename: Path):
+    # copies only flow forward by at most the matches count, so difference
+    # values wait in a ring buffer long enough for the most matches possible,
+    # that is every card number (repeated numbers match once per repeat)
+    summary = 0
+    extra_copies = 0
+    with open(filename) as data_file:
+        layout = None
+        for card_idx, line in enumerate(data_file):
+            if layout is None:
+                layout = Layout.from_line(line)
+                difference = [0] * (len(layout.numbers_slices) + 2)
+            slot = card_idx % len(difference)
+            extra_copies += difference[slot]
+            difference[slot] = 0
+            copies = 1 + extra_copies
+            summary += copies
+
+            matches_count = layout.parse(line).matches_count
+            if matches_count:
+                difference[(card_idx + 1) % len(difference)] += copies
+                end = card_idx + matches_count + 1
+                difference[end % len(difference)] -= copies
+    return summary
+
+
+def benchmark():
+    # data.txt matches counts tiled, copies grow far beyond what fits in RAM
+    # as card objects (8 172 507 copies already for data.txt alone)
+    import timeit
+
+    filename = Path(__file__).parent.absolute() / "data.txt"
+    matches_counts = [card.matches_count for card in read_cards(filename)]
+    for tiles in (1, 10, 100, 1000, 10000):
+        counts = matches_counts * tiles
+        seconds = timeit.timeit(lambda: count_copies(counts), number=1)
+        copies = count_copies(counts)
+        print(f"{len(counts):>9} cards {copies:>14} copies {seconds:.4f}s")
+
+
 def main():
     filename = Path(__file__).parent.absolute() / "data.txt"
     # summary = part1(filename)
-    summary = part2(filename)
+    # assert summary == 20107
+    summary = part2_streaming(filename)
+    assert summary == 8172507
     return summary
 
 
@@ -0,0 +1,61 @@
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+# loaded by path under its own name, every day has a main.py of its own
+spec = importlib.util.spec_from_file_location(
+    "day04", Path(__file__).parent / "main.py"
+)
+sys.modules["day04"] = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(sys.modules["day04"])
+
+from day04 import *
+
+
+def test_part2_streaming_example():
+    filename = Path(__file__).parent / "test.txt"
+    assert part2_streaming(filename) == part2_counting(filename) == part2(filename)
+    assert part2_streaming(filename) == 30
+
+
+def test_part2_streaming_repeated_numbers(tmp_path):
+    # four matches while only two winning numbers, copies reach card 5
+    filename = tmp_path / "cards.txt"
+    filename.write_text(
+        "Card 1:  5  1 |  5  5  5  5\n"
+        + "".join(f"Card {idx}:  7  8 |  1  2  3  4\n" for idx in range(2, 7))
+    )
+    assert part2_streaming(filename) == part2_counting(filename) == part2(filename)
+    assert part2_streaming(filename) == 10
+
+
+def test_bitset_and_batch_scores_example():
+    filename = Path(__file__).parent / "test.txt"
+    cards = list(read_cards(filename))
+    bitset_cards = list(read_bitset_cards(filename))
+    matches_counts, values = score_cards(filename)
+    assert [card.matches_count for card in bitset_cards] == [
+        card.matches_count for card in cards
+    ]
+    assert list(matches_counts) == [card.matches_count for card in cards]
+    assert sum(card.value for card in bitset_cards) == part1(filename) == 13
+    assert int(values.sum()) == part1(filename)
+
+
+def test_bitset_cards_reject_repeated_numbers(tmp_path):
+    filename = tmp_path / "cards.txt"
+    filename.write_text("Card 1:  5  1 |  5  5  5  5\n")
+    assert part1(filename) == int(score_cards(filename)[1].sum()) == 8
+    with pytest.raises(ValueError):
+        list(read_bitset_cards(filename))
+
+
+def test_empty_file(tmp_path):
+    filename = tmp_path / "cards.txt"
+    filename.write_text("")
+    matches_counts, values = score_cards(filename)
+    assert len(matches_counts) == len(values) == 0
+    assert list(read_bitset_cards(filename)) == []
+    assert part1(filename) == part2_streaming(filename) == 0
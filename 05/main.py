@@ -1,6 +1,11 @@
 import dataclasses
+from bisect import bisect_right
+from functools import reduce
+from itertools import pairwise
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Optional
+
+import numpy as np
 
 
 class SourceDestinationMap:
@@ -42,6 +47,14 @@ class SourceDestinationMap:
     def destination(self):
         return f"{self.destination_range_start}-{self.destination_range_end}"
 
+    @property
+    def source_range(self) -> tuple[int, int]:
+        return self.source_range_start, self.source_range_end
+
+    @property
+    def destination_range(self) -> tuple[int, int]:
+        return self.destination_range_start, self.destination_range_end
+
     def __repr__(self):
         return f"{self.source} -{'D' if self.default else '-'}-> {self.destination}"
 
@@ -295,21 +308,178 @@ class Map:
             SourceDestinationMap(0, 0, 9_999_999_999, default=True)
         ]
     )
-    _traverse: Optional[dict[str, SourceDestinationMap]] = None
+    _traverse: Optional[dict[tuple[int, int], SourceDestinationMap]] = None
+    _source_starts: Optional[list[int]] = None
 
-    def traverse(self, source: str):
+    def traverse(self, source: Optional[tuple[int, int]]):
+        # map whose destination range is exactly given (start, end) range
         if self._traverse is None:
             self._traverse = {
-                f"{source_destination_map.destination}": source_destination_map
+                source_destination_map.destination_range: source_destination_map
                 for source_destination_map in self.source_destination_maps
             }
         return self._traverse.get(source)
 
+    @property
+    def source_starts(self) -> list[int]:
+        # source_destination_maps are sorted by source
+        if self._source_starts is None:
+            self._source_starts = [
+                source_destination_map.source_range_start
+                for source_destination_map in self.source_destination_maps
+            ]
+        return self._source_starts
+
+    def lookup(self, value: int) -> int:
+        # values outside of all source ranges map to themselves
+        idx = bisect_right(self.source_starts, value) - 1
+        if idx < 0:
+            return value
+        result = self.source_destination_maps[idx].transform(value)
+        return value if result is None else result
+
+    def pieces(self, start: int, end: int):
+        # (start, end, target start, default) pieces of source range, split on
+        # source range boundaries, gaps map to themselves
+        source_starts = self.source_starts
+        idx = bisect_right(source_starts, start) - 1
+        while start <= end:
+            if idx >= 0 and start <= self.source_destination_maps[idx].source_range_end:
+                source_destination_map = self.source_destination_maps[idx]
+                piece_end = min(end, source_destination_map.source_range_end)
+                target = source_destination_map.transform(start)
+                default = source_destination_map.default
+            else:
+                next_start = (
+                    source_starts[idx + 1] if idx + 1 < len(source_starts) else end + 1
+                )
+                piece_end = min(end, next_start - 1)
+                target = start
+                default = True
+            yield start, piece_end, target, default
+            start = piece_end + 1
+            idx += 1
+
+    def transform_range(self, start: int, length: int) -> list[tuple[int, int]]:
+        # destination (start, length) ranges of source range
+        return [
+            (target, piece_end - piece_start + 1)
+            for piece_start, piece_end, target, _ in self.pieces(
+                start, start + length - 1
+            )
+        ]
+
+    def compose(self, other: "Map") -> "Map":
+        # self followed by other as a single map, neighbours with the same
+        # offset are merged
+        composed: list[SourceDestinationMap] = []
+        for source_destination_map in self.source_destination_maps:
+            offset = (
+                source_destination_map.source_range_start
+                - source_destination_map.destination_range_start
+            )
+            for piece_start, piece_end, target, default in other.pieces(
+                source_destination_map.destination_range_start,
+                source_destination_map.destination_range_end,
+            ):
+                default = default and source_destination_map.default
+                previous = composed[-1] if composed else None
+                if (
+                    previous is not None
+                    and previous.source_range_end + 1 == piece_start + offset
+                    and previous.transform(previous.source_range_end) + 1 == target
+                    and previous.default == default
+                ):
+                    previous.source_range_end = piece_end + offset
+                    previous.destination_range_end = target + piece_end - piece_start
+                    continue
+                composed.append(
+                    SourceDestinationMap(
+                        source_range_start=piece_start + offset,
+                        destination_range_start=target,
+                        range_length=piece_end - piece_start + 1,
+                        default=default,
+                    )
+                )
+        return Map(other.name, composed)
+
+    def lookup_many(self, values: Iterable[int]) -> list[int]:
+        return [self.lookup(value) for value in values]
+
+    def update(self, source_destination_maps: list[SourceDestinationMap]):
+        # every index is built again on first use
+        self.source_destination_maps = source_destination_maps
+        self._traverse = None
+        self._source_starts = None
+
     def add(self, new_source_destination_map: SourceDestinationMap):
         new_map = []
         for source_destination_map in self.source_destination_maps:
             new_map.extend(source_destination_map.insert(new_source_destination_map))
-        self.source_destination_maps = new_map
+        self.update(new_map)
+
+    def add_many(self, new_source_destination_maps: list[SourceDestinationMap]):
+        # same result as add for each of them, but when map is still a single
+        # default range and new ranges don't overlap it is a single sweep
+        # over them sorted, gaps are filled with default ranges
+        new_maps = sorted(
+            new_source_destination_maps, key=lambda mmap: mmap.source_range_start
+        )
+        if len(self.source_destination_maps) != 1 or not new_maps:
+            self.__add_each(new_source_destination_maps)
+            return
+        default = self.source_destination_maps[0]
+        if (
+            not default.default
+            or default.source_range_start != default.destination_range_start
+            or new_maps[0].source_range_start < default.source_range_start
+            or new_maps[-1].source_range_end > default.source_range_end
+            or any(mmap.source_range_end < mmap.source_range_start for mmap in new_maps)
+            or any(
+                left.source_range_end >= right.source_range_start
+                for left, right in pairwise(new_maps)
+            )
+        ):
+            self.__add_each(new_source_destination_maps)
+            return
+
+        new_map = []
+        cursor = default.source_range_start
+        for mmap in new_maps:
+            if cursor < mmap.source_range_start:
+                new_map.append(
+                    SourceDestinationMap(
+                        source_range_start=cursor,
+                        destination_range_start=cursor,
+                        source_range_end=mmap.source_range_start - 1,
+                        destination_range_end=mmap.source_range_start - 1,
+                        default=True,
+                    )
+                )
+            new_map.append(
+                SourceDestinationMap(
+                    source_range_start=mmap.source_range_start,
+                    destination_range_start=mmap.destination_range_start,
+                    source_range_end=mmap.source_range_end,
+                    destination_range_end=mmap.destination_range_end,
+                )
+            )
+            cursor = mmap.source_range_end + 1
+        if cursor <= default.source_range_end:
+            new_map.append(
+                SourceDestinationMap(
+                    source_range_start=cursor,
+                    destination_range_start=cursor,
+                    source_range_end=default.source_range_end,
+                    destination_range_end=default.source_range_end,
+                    default=True,
+                )
+            )
+        self.update(new_map)
+
+    def __add_each(self, new_source_destination_maps: list[SourceDestinationMap]):
+        for new_source_destination_map in new_source_destination_maps:
+            self.add(new_source_destination_map)
 
     def split_source(self, source_range_start, source_range_end):
         new_map = []
@@ -320,7 +490,7 @@ class Map:
                 )
             )
             new_map.extend(gen)
-        self.source_destination_maps = new_map
+        self.update(new_map)
 
     def split_destination(self, destination_range_start, destination_range_end):
         new_map = []
@@ -331,7 +501,160 @@ class Map:
                 )
             )
             new_map.extend(gen)
-        self.source_destination_maps = new_map
+        self.update(new_map)
+
+
+@dataclasses.dataclass
+class ArrayMap:
+    # Map as parallel int64 arrays sorted by source, ends are inclusive and
+    # destination is source + offset
+    name: str
+    starts: np.ndarray
+    ends: np.ndarray
+    offsets: np.ndarray
+    default: np.ndarray
+
+    @classmethod
+    def from_map(cls, mmap: Map) -> "ArrayMap":
+        source_destination_maps = mmap.source_destination_maps
+        starts = np.fromiter(
+            (sdm.source_range_start for sdm in source_destination_maps),
+            dtype=np.int64,
+            count=len(source_destination_maps),
+        )
+        ends = np.fromiter(
+            (sdm.source_range_end for sdm in source_destination_maps),
+            dtype=np.int64,
+            count=len(source_destination_maps),
+        )
+        destinations = np.fromiter(
+            (sdm.destination_range_start for sdm in source_destination_maps),
+            dtype=np.int64,
+            count=len(source_destination_maps),
+        )
+        default = np.fromiter(
+            (sdm.default for sdm in source_destination_maps),
+            dtype=bool,
+            count=len(source_destination_maps),
+        )
+        return cls(mmap.name, starts, ends, destinations - starts, default)
+
+    def to_map(self) -> Map:
+        return Map(
+            self.name,
+            [
+                SourceDestinationMap(
+                    source_range_start=start,
+                    destination_range_start=start + offset,
+                    source_range_end=end,
+                    destination_range_end=end + offset,
+                    default=default,
+                )
+                for start, end, offset, default in zip(
+                    self.starts.tolist(),
+                    self.ends.tolist(),
+                    self.offsets.tolist(),
+                    self.default.tolist(),
+                )
+            ],
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            array.nbytes
+            for array in (self.starts, self.ends, self.offsets, self.default)
+        )
+
+    def __segments(self, values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # index of segment holding every value and mask of covered values
+        idx = np.searchsorted(self.starts, values, side="right") - 1
+        safe_idx = np.maximum(idx, 0)
+        covered = (idx >= 0) & (values <= self.ends[safe_idx])
+        return safe_idx, covered
+
+    def lookup_many(self, values: np.ndarray) -> np.ndarray:
+        # values outside of all segments map to themselves
+        values = np.asarray(values, dtype=np.int64)
+        if not len(self.starts):
+            return values.copy()
+        idx, covered = self.__segments(values)
+        return values + np.where(covered, self.offsets[idx], 0)
+
+    def split(self, points: np.ndarray) -> "ArrayMap":
+        # new segment starts at every point inside of an existing segment
+        points = np.unique(np.asarray(points, dtype=np.int64))
+        idx, covered = self.__segments(points)
+        inside = covered & (points != self.starts[idx])
+        points, idx = points[inside], idx[inside] + 1
+        starts = np.insert(self.starts, idx, points)
+        ends = np.insert(self.ends, idx, self.ends[idx - 1])
+        ends[:-1] = np.minimum(ends[:-1], starts[1:] - 1)
+        return ArrayMap(
+            self.name,
+            starts,
+            ends,
+            np.insert(self.offsets, idx, self.offsets[idx - 1]),
+            np.insert(self.default, idx, self.default[idx - 1]),
+        )
+
+    def split_source(self, source_range_start, source_range_end) -> "ArrayMap":
+        return self.split([source_range_start, source_range_end + 1])
+
+    def compose(self, other: "ArrayMap") -> "ArrayMap":
+        # self followed by other, images of segments are cut on boundaries of
+        # other, neighbours with the same offset are merged like Map.compose
+        cuts = np.unique(np.concatenate([other.starts, other.ends + 1]))
+        image_starts = self.starts + self.offsets
+        image_ends = self.ends + self.offsets
+        first_cut = np.searchsorted(cuts, image_starts, side="right")
+        stop_cut = np.searchsorted(cuts, image_ends, side="right")
+        pieces_count = 1 + stop_cut - first_cut
+        segment = np.repeat(np.arange(len(self.starts)), pieces_count)
+        first_piece = np.cumsum(pieces_count) - pieces_count
+        piece = np.arange(len(segment)) - first_piece[segment]
+
+        piece_starts = np.where(
+            piece == 0,
+            image_starts[segment],
+            cuts[np.minimum(first_cut[segment] + piece - 1, len(cuts) - 1)],
+        )
+        is_last = piece == pieces_count[segment] - 1
+        piece_ends = np.where(
+            is_last, image_ends[segment], np.append(piece_starts[1:], 0) - 1
+        )
+        if len(other.starts):
+            idx, covered = other.__segments(piece_starts)
+            other_offsets = np.where(covered, other.offsets[idx], 0)
+            other_default = np.where(covered, other.default[idx], True)
+        else:
+            other_offsets = np.zeros(len(piece_starts), dtype=np.int64)
+            other_default = np.ones(len(piece_starts), dtype=bool)
+
+        starts = piece_starts - self.offsets[segment]
+        ends = piece_ends - self.offsets[segment]
+        offsets = self.offsets[segment] + other_offsets
+        default = self.default[segment] & other_default
+        merged = (
+            (starts[1:] == ends[:-1] + 1)
+            & (offsets[1:] == offsets[:-1])
+            & (default[1:] == default[:-1])
+        )
+        keep = np.append(True, ~merged)
+        return ArrayMap(
+            other.name,
+            starts[keep],
+            ends[np.append(keep[1:], True)],
+            offsets[keep],
+            default[keep],
+        )
+
+
+def parse_mapping(line: str) -> SourceDestinationMap:
+    destination_range_start, source_range_start, range_length = line.split(" ", 3)
+    return SourceDestinationMap(
+        *map(int, [source_range_start, destination_range_start, range_length])
+    )
 
 
 def fill_maps(
@@ -371,11 +694,139 @@ def fill_maps(
             continue
         if not line.strip():
             continue
-        destination_range_start, source_range_start, range_length = line.split(" ", 3)
-        mapping = SourceDestinationMap(
-            *map(int, [source_range_start, destination_range_start, range_length])
+        current_map.add(parse_mapping(line))
+
+
+SECTIONS = [
+    "seed-to-soil map",
+    "soil-to-fertilizer map",
+    "fertilizer-to-water map",
+    "water-to-light map",
+    "light-to-temperature map",
+    "temperature-to-humidity map",
+    "humidity-to-plant map",
+    "humidity-to-location map",
+]
+
+
+def read_almanac(filename: Path) -> tuple[list[int], list[Map]]:
+    # seeds and maps from seed-to-soil up to humidity-to-location, in order,
+    # mappings of every section are collected and added all at once
+    maps = [
+        Map("soil"),  # seed-to-
+        Map("fertilizer"),  # soil-to-
+        Map("water"),  # fertilizer-to-
+        Map("light"),  # water-to-
+        Map("temperature"),  # light-to-
+        Map("humidity"),  # temperature-to-
+        Map("plant"),  # humidity-to-
+        Map("location"),  # humidity-to-
+    ]
+    sections = dict(zip(SECTIONS, maps))
+    mappings: dict[str, list[SourceDestinationMap]] = {}
+    with open(filename) as data_file:
+        seeds: list[int] = list(
+            map(int, data_file.readline().split(":", 1)[1].strip(" ").split(" "))
         )
-        current_map.add(mapping)
+        for line in data_file:
+            if ":" in line:
+                section_name = line.split(":", 1)[0]
+                if section_name not in sections:
+                    raise ValueError(f"Unknown section {section_name}")
+                current_mappings = mappings.setdefault(section_name, [])
+                continue
+            if not line.strip():
+                continue
+            current_mappings.append(parse_mapping(line))
+    for section_name, section_mappings in mappings.items():
+        sections[section_name].add_many(section_mappings)
+    return seeds, maps
+
+
+@dataclasses.dataclass
+class Almanac:
+    seeds: list[int]
+    maps: list[Map]
+    _chain: Optional[Map] = None
+    _array_maps: Optional[list[ArrayMap]] = None
+
+    @classmethod
+    def from_file(cls, filename: Path) -> "Almanac":
+        return cls(*read_almanac(filename))
+
+    @property
+    def chain(self) -> Map:
+        # seed-to-location map, composed once
+        if self._chain is None:
+            self._chain = reduce(Map.compose, self.maps)
+        return self._chain
+
+    def locate(self, seed: int) -> int:
+        return self.chain.lookup(seed)
+
+    def locate_many(self, seeds: np.ndarray) -> tuple[np.ndarray, int]:
+        # maps are converted to arrays once, then reused for every batch
+        if self._array_maps is None:
+            self._array_maps = list(map(ArrayMap.from_map, self.maps))
+        return locate_many(self._array_maps, seeds)
+
+    def lowest_location(self, seed_ranges: Iterable[tuple[int, int]]) -> int:
+        # seed_ranges as (start, length) pairs
+        return min(
+            location
+            for start, length in seed_ranges
+            for location, _ in self.chain.transform_range(start, length)
+        )
+
+
+def locate(maps: list[Map], value: int) -> int:
+    # value passed through all maps one by one
+    for mmap in maps:
+        value = mmap.lookup(value)
+    return value
+
+
+def locate_many(
+    maps: Iterable[Map | ArrayMap], seeds: np.ndarray
+) -> tuple[np.ndarray, int]:
+    # locations of all seeds and the lowest of them, every map is a single
+    # searchsorted over segment starts and an offsets gather, there is no
+    # lowest location of no seeds so an empty batch raises ValueError
+    locations = np.asarray(seeds, dtype=np.int64)
+    if not locations.size:
+        raise ValueError("No seeds to locate")
+    for mmap in maps:
+        if isinstance(mmap, Map):
+            mmap = ArrayMap.from_map(mmap)
+        locations = mmap.lookup_many(locations)
+    return locations, int(locations.min())
+
+
+def propagate(
+    maps: list[Map], ranges: Iterable[tuple[int, int]]
+) -> list[tuple[int, int]]:
+    # (start, length) ranges pushed through maps one by one, ranges are only
+    # split where they cross a source range boundary, touching ones are merged
+    ranges = list(ranges)
+    for mmap in maps:
+        pieces = sorted(
+            piece
+            for start, length in ranges
+            for piece in mmap.transform_range(start, length)
+        )
+        ranges = []
+        for start, length in pieces:
+            if ranges and start <= ranges[-1][0] + ranges[-1][1]:
+                last_start, last_length = ranges[-1]
+                end = max(last_start + last_length, start + length)
+                ranges[-1] = (last_start, end - last_start)
+            else:
+                ranges.append((start, length))
+    return ranges
+
+
+def lowest_location(maps: list[Map], seed_ranges: Iterable[tuple[int, int]]) -> int:
+    return min(start for start, _ in propagate(maps, seed_ranges))
 
 
 def seeds_range(seeds: list[int]):
@@ -396,38 +847,26 @@ def main():
     current_dir = Path(__file__).parent.absolute()
     summary = 0
 
-    seed_to_soil_map = Map("soil")  # seed-to-
-    soil_to_fertilizer_map = Map("fertilizer")  # soil-to-
-    fertilizer_to_water_map = Map("water")  # fertilizer-to-
-    water_to_light_map = Map("light")  # water-to-
-    light_to_temperature_map = Map("temperature")  # light-to-
-    temperature_to_humidity_map = Map("humidity")  # temperature-to-
-    humidity_to_plant_map = Map("plant")  # humidity-to-
-    humidity_to_location_map = Map("location")  # humidity-to-
-
-    with open(current_dir / "data.txt") as data_file:
-        seeds: list[int] = list(
-            map(int, data_file.readline().split(":", 1)[1].strip(" ").split(" "))
-        )
-        map_filler = fill_maps(
-            seed_to_soil_map,
-            soil_to_fertilizer_map,
-            fertilizer_to_water_map,
-            water_to_light_map,
-            light_to_temperature_map,
-            temperature_to_humidity_map,
-            humidity_to_plant_map,
-            humidity_to_location_map,
-        )
-        next(map_filler)
-        for line in data_file:
-            map_filler.send(line)
+    seeds, maps = read_almanac(current_dir / "data.txt")
+    (
+        seed_to_soil_map,
+        soil_to_fertilizer_map,
+        fertilizer_to_water_map,
+        water_to_light_map,
+        light_to_temperature_map,
+        temperature_to_humidity_map,
+        humidity_to_plant_map,
+        humidity_to_location_map,
+    ) = maps
 
     seed_map = Map("seed")
     # part 1
+    # summary = min(locate(maps, seed) for seed in seeds)
+    # summary = locate_many(maps, np.array(seeds))[1]
     # for seed in seeds:
     #     seed_map.add(SourceDestinationMap(seed, seed, 1))
     # part 2
+    # summary = lowest_location(maps, seeds_range(seeds))
     for seed, size in seeds_range(seeds):
         seed_map.add(SourceDestinationMap(seed, seed, size))
 
@@ -449,16 +888,20 @@ def main():
     # traverse
     for location in humidity_to_location_map.source_destination_maps:
         temperature = temperature_to_humidity_map.traverse(
-            location.source if location else ""
+            location.source_range if location else None
         )
         light = light_to_temperature_map.traverse(
-            temperature.source if temperature else ""
+            temperature.source_range if temperature else None
+        )
+        water = water_to_light_map.traverse(light.source_range if light else None)
+        fertilizer = fertilizer_to_water_map.traverse(
+            water.source_range if water else None
         )
-        water = water_to_light_map.traverse(light.source if light else "")
-        fertilizer = fertilizer_to_water_map.traverse(water.source if water else "")
-        soil = soil_to_fertilizer_map.traverse(fertilizer.source if fertilizer else "")
-        seed = seed_to_soil_map.traverse(soil.source if soil else "")
-        input_seed = seed_map.traverse(seed.source if seed else "")
+        soil = soil_to_fertilizer_map.traverse(
+            fertilizer.source_range if fertilizer else None
+        )
+        seed = seed_to_soil_map.traverse(soil.source_range if soil else None)
+        input_seed = seed_map.traverse(seed.source_range if seed else None)
         if input_seed is not None and not input_seed.default:
             candidates.append(
                 location.destination_range_start,
@@ -471,5 +914,62 @@ def main():
     return summary
 
 
+def benchmark(lines=10**5):
+    # random disjoint mappings, add is quadratic so it gets fewer of them
+    import random
+    import timeit
+
+    starts = random.sample(range(0, 9_000_000_000, 10_000), lines)
+    mappings = [
+        SourceDestinationMap(start, random.randrange(10**9), random.randint(1, 10_000))
+        for start in starts
+    ]
+    for count in (10**3, 10**4, lines):
+        sweep = timeit.timeit(lambda: Map("sweep").add_many(mappings[:count]), number=1)
+        print(f"add_many {count:>7} mappings {sweep:.3f}s")
+
+    def add_each(count):
+        mmap = Map("each")
+        for mapping in mappings[:count]:
+            mmap.add(mapping)
+
+    for count in (10**3, 3 * 10**3):
+        each = timeit.timeit(lambda: add_each(count), number=1)
+        print(f"add      {count:>7} mappings {each:.3f}s")
+
+
+def array_benchmark(segments=10**5):
+    # memory per segment and compose time of object and array based maps
+    import random
+    import timeit
+    import tracemalloc
+
+    def random_map(name):
+        starts = random.sample(range(0, 9_000_000_000, 10_000), segments // 2)
+        mmap = Map(name)
+        mmap.add_many(
+            [
+                SourceDestinationMap(start, random.randrange(10**9), 5_000)
+                for start in starts
+            ]
+        )
+        return mmap
+
+    tracemalloc.start()
+    left = random_map("left")
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    right = random_map("right")
+    array_left, array_right = ArrayMap.from_map(left), ArrayMap.from_map(right)
+    count = len(left.source_destination_maps)
+    print(
+        f"{count} segments, bytes per segment: "
+        f"objects {size / count:.0f} arrays {array_left.nbytes / count:.0f}"
+    )
+    objects = timeit.timeit(lambda: left.compose(right), number=1)
+    arrays = timeit.timeit(lambda: array_left.compose(array_right), number=1)
+    print(f"compose: objects {objects:.3f}s arrays {arrays:.3f}s")
+
+
 if __name__ == "__main__":
     print(main())
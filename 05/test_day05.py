@@ -1,5 +1,17 @@
+import importlib.util
+import sys
+from pathlib import Path
+
 import pytest
-from main import *
+
+# loaded by path under its own name, every day has a main.py of its own
+spec = importlib.util.spec_from_file_location(
+    "day05", Path(__file__).parent / "main.py"
+)
+sys.modules["day05"] = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(sys.modules["day05"])
+
+from day05 import *
 
 
 def test_sync():
@@ -273,3 +285,150 @@ def test_insert_5():
             default=False,
         ),
     ]
+
+
+def test_lookup():
+    mmap = Map(name="soil")
+    mmap.add(SourceDestinationMap(98, 50, 2))
+    mmap.add(SourceDestinationMap(50, 52, 48))
+
+    assert mmap.lookup(0) == 0
+    assert mmap.lookup(49) == 49
+    assert mmap.lookup(50) == 52
+    assert mmap.lookup(97) == 99
+    assert mmap.lookup(98) == 50
+    assert mmap.lookup(99) == 51
+    assert mmap.lookup(100) == 100
+    assert mmap.lookup_many([79, 14, 55, 13]) == [81, 14, 57, 13]
+
+
+def test_locate():
+    seeds, maps = read_almanac(Path(__file__).parent / "test.txt")
+
+    assert [locate(maps, seed) for seed in seeds] == [82, 43, 86, 35]
+
+
+def test_fill_maps_without_close():
+    filename = Path(__file__).parent / "test.txt"
+    maps = [Map(name) for name in "abcdefgh"]
+    map_filler = fill_maps(*maps)
+    next(map_filler)
+    with open(filename) as data_file:
+        data_file.readline()
+        for line in data_file:
+            map_filler.send(line)
+
+    _, almanac_maps = read_almanac(filename)
+    for mmap, almanac_map in zip(maps, almanac_maps):
+        assert mmap.source_destination_maps == almanac_map.source_destination_maps
+    assert len(maps[-1].source_destination_maps) == 4
+
+
+def test_compose():
+    left = Map(name="left")
+    left.add(SourceDestinationMap(10, 100, 10))
+    right = Map(name="right")
+    right.add(SourceDestinationMap(95, 0, 10))
+
+    composed = left.compose(right)
+
+    assert composed.source_destination_maps == [
+        SourceDestinationMap(0, 0, 10, default=True),
+        SourceDestinationMap(10, 5, 5),
+        SourceDestinationMap(15, 105, 5),
+        SourceDestinationMap(20, 20, 75, default=True),
+        SourceDestinationMap(95, 0, 10),
+        SourceDestinationMap(105, 105, 9_999_999_894, default=True),
+    ]
+    assert composed.transform_range(8, 10) == [(8, 2), (5, 5), (105, 3)]
+
+
+def test_almanac_chain():
+    almanac = Almanac.from_file(Path(__file__).parent / "test.txt")
+
+    for value in range(110):
+        assert almanac.locate(value) == locate(almanac.maps, value)
+    assert almanac.lowest_location(seeds_range(almanac.seeds)) == 46
+
+
+def test_traverse_after_split():
+    mmap = Map(name="soil")
+    mmap.add(SourceDestinationMap(50, 0, 50))
+    assert mmap.traverse((0, 49)) == SourceDestinationMap(50, 0, 50)
+
+    mmap.split_destination(0, 9)
+
+    assert mmap.traverse((0, 49)) is None
+    assert mmap.traverse((0, 9)) == SourceDestinationMap(50, 0, 10)
+    assert mmap.traverse((10, 49)) == SourceDestinationMap(60, 10, 40)
+
+
+@pytest.mark.parametrize(
+    "mappings",
+    [
+        [(98, 50, 2), (50, 52, 48)],
+        [(0, 10, 5), (5, 0, 5), (20, 30, 1)],
+        [(10, 0, 20), (15, 100, 10)],  # overlapping, added one by one
+    ],
+)
+def test_add_many(mappings):
+    each = Map(name="each")
+    for mapping in mappings:
+        each.add(SourceDestinationMap(*mapping))
+    many = Map(name="many")
+
+    many.add_many([SourceDestinationMap(*mapping) for mapping in mappings])
+
+    assert many.source_destination_maps == each.source_destination_maps
+
+
+def test_lowest_location():
+    seeds, maps = read_almanac(Path(__file__).parent / "test.txt")
+
+    assert propagate(maps, [(79, 14)]) == [(46, 10), (60, 1), (82, 3)]
+    assert lowest_location(maps, seeds_range(seeds)) == 46
+    assert lowest_location(maps, [(seed, 1) for seed in seeds]) == 35
+
+
+def test_array_map():
+    seeds, maps = read_almanac(Path(__file__).parent / "test.txt")
+    chain = reduce(Map.compose, maps)
+
+    array_chain = reduce(ArrayMap.compose, map(ArrayMap.from_map, maps))
+
+    assert array_chain.to_map().source_destination_maps == (
+        chain.source_destination_maps
+    )
+    assert array_chain.lookup_many(seeds).tolist() == [82, 43, 86, 35]
+
+
+@pytest.mark.parametrize("split", [[90, 109], [150, 200], [100, 100], [190, 210]])
+def test_array_map_split_source(split):
+    mmap = Map(name="map", source_destination_maps=[SourceDestinationMap(100, 0, 100)])
+    array_map = ArrayMap.from_map(mmap)
+
+    mmap.split_source(*split)
+
+    result = array_map.split_source(*split).to_map()
+    assert result.source_destination_maps == mmap.source_destination_maps
+
+
+def test_locate_many():
+    almanac = Almanac.from_file(Path(__file__).parent / "test.txt")
+
+    locations, lowest = locate_many(almanac.maps, np.array(almanac.seeds))
+
+    assert locations.tolist() == [82, 43, 86, 35]
+    assert lowest == 35
+    assert almanac.locate_many(np.arange(110))[0].tolist() == [
+        almanac.locate(value) for value in range(110)
+    ]
+
+
+def test_locate_many_no_seeds():
+    almanac = Almanac.from_file(Path(__file__).parent / "test.txt")
+
+    with pytest.raises(ValueError):
+        locate_many(almanac.maps, np.array([], dtype=np.int64))
+    with pytest.raises(ValueError):
+        almanac.locate_many([])